@@ -10,12 +10,23 @@ from utils.auth import (
     get_firestore_db
 )
 from utils.processor import process_document, create_word_doc
+from utils.circuit_breaker import CircuitBreaker, CircuitBreakerOpen
+from utils.ollama_pool import OllamaPool
+import os
 import requests
+from requests.adapters import HTTPAdapter
 import time
-from datetime import datetime
+import orjson
+import asyncio
+import httpx
 import uuid
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from firebase_admin import firestore
+from google.api_core.exceptions import Aborted
 import subprocess
+from urllib.parse import urlparse
 
 # Configure app
 st.set_page_config(
@@ -25,110 +36,415 @@ st.set_page_config(
 )
 
 # Ollama configuration
-OLLAMA_URL = "http://localhost:11434"
+# Comma-separated list of backends; the first is started locally if it is on this host
+DEFAULT_OLLAMA_URL = "http://localhost:11434"
+OLLAMA_URLS = [
+    url.strip().rstrip("/")
+    for url in (os.environ.get("OLLAMA_URLS") or DEFAULT_OLLAMA_URL).split(",")
+    if url.strip()
+] or [DEFAULT_OLLAMA_URL]
+OLLAMA_URL = OLLAMA_URLS[0]
+OLLAMA_IS_LOCAL = urlparse(OLLAMA_URL).hostname in ("localhost", "127.0.0.1", "::1")
 OLLAMA_MODEL = "deepseek-r1:7b"
+OLLAMA_KEEP_ALIVE = "30m"  # How long Ollama keeps the model loaded after a call
+OLLAMA_NUM_CTX = 16384  # Context window requested from Ollama
+PROMPT_TOKEN_BUDGET = OLLAMA_NUM_CTX // 2  # Leave the other half for the rewrite
+BYTES_PER_TOKEN = 3  # Rough UTF-8 bytes per token for English text
+# Sent on every call: Ollama reloads the model when num_ctx changes, so the
+# preload and test calls must match the chat calls to keep it warm
+OLLAMA_OPTIONS = {
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "repeat_penalty": 1.1,
+    "num_ctx": OLLAMA_NUM_CTX
+}
 MAX_RETRIES = 3
 INITIAL_TIMEOUT = 30
 TIMEOUT_BACKOFF_FACTOR = 2
+OLLAMA_START_POLLS = 20
+OLLAMA_START_POLL_INTERVAL = 0.25  # Seconds between startup probes
+CONNECTION_CHECK_TTL = 10  # Seconds to reuse a health probe result
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_COOLDOWN = 30  # Seconds before a half-open probe is allowed
+PREVIEW_INTERVAL = 0.2  # Min seconds between streamed preview updates
+OLLAMA_SLOTS_PER_BACKEND = 1  # Concurrent generations per server (its OLLAMA_NUM_PARALLEL)
+OLLAMA_CONCURRENCY = len(OLLAMA_URLS) * OLLAMA_SLOTS_PER_BACKEND  # Max documents enhanced at once in a batch
+
+# Firestore configuration
+FIRESTORE_BATCH_LIMIT = 500  # Max mutations per WriteBatch
+FIRESTORE_WRITE_WORKERS = 40
+FIRESTORE_BACKGROUND_WORKERS = 4
+ENHANCEMENT_CACHE_COLLECTION = "enhancement_cache"
+ENHANCEMENT_MEMO_SIZE = 256  # Cache entries memoized in-process
+
+@st.cache_resource
+def get_http_session():
+    """Shared HTTP session so probes and chat calls reuse pooled connections"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_resource
+def get_ollama_pool():
+    """Least-connections pool over the configured Ollama backends, one breaker each"""
+    return OllamaPool(
+        OLLAMA_URLS,
+        slots_per_backend=OLLAMA_SLOTS_PER_BACKEND,
+        breaker_factory=lambda: CircuitBreaker(
+            failure_threshold=BREAKER_FAILURE_THRESHOLD,
+            cooldown=BREAKER_COOLDOWN,
+            half_open_max_calls=1
+        )
+    )
 
 def start_ollama_server():
-    """Attempt to start Ollama server if not running"""
+    """Attempt to start the local Ollama server and wait until it answers"""
+    if not OLLAMA_IS_LOCAL:
+        return False  # A remote backend can't be started from here
+    
     try:
         subprocess.Popen(["ollama", "serve"], 
                         stdout=subprocess.DEVNULL,
                         stderr=subprocess.DEVNULL)
-        time.sleep(3)  # Give it time to start
-        return True
     except:
         return False
+    
+    # Poll instead of sleeping a fixed time so warm starts return quickly
+    for _ in range(OLLAMA_START_POLLS):
+        try:
+            response = get_http_session().get(f"{OLLAMA_URL}/api/tags", timeout=0.5)
+            if response.status_code == 200:
+                warm_ollama_models.clear()  # Preload again now that the server is up
+                return True
+        except:
+            pass
+        time.sleep(OLLAMA_START_POLL_INTERVAL)
+    return False
 
+@st.cache_data(ttl=CONNECTION_CHECK_TTL, show_spinner=False)
 def check_ollama_connection():
-    """Check if Ollama server is responsive"""
-    try:
-        response = requests.get(f"{OLLAMA_URL}/api/tags", timeout=5)
-        return response.status_code == 200
-    except:
-        # Try to restart if not running
-        if not start_ollama_server():
-            return False
-        time.sleep(5)  # Additional wait time after restart attempt
+    """Check if any Ollama server is responsive (cached briefly across reruns)"""
+    for url in OLLAMA_URLS:
         try:
-            response = requests.get(f"{OLLAMA_URL}/api/tags", timeout=5)
-            return response.status_code == 200
+            response = get_http_session().get(f"{url}/api/tags", timeout=5)
+            if response.status_code == 200:
+                return True
         except:
-            return False
+            continue
+    
+    # Try to restart the local server if nothing is reachable
+    return OLLAMA_IS_LOCAL and start_ollama_server()
+
+def _preload_model(session: requests.Session, url: str):
+    """Ask one backend to load the model; a request with no prompt only loads it"""
+    try:
+        session.post(
+            f"{url}/api/generate",
+            json={
+                "model": OLLAMA_MODEL,
+                "keep_alive": OLLAMA_KEEP_ALIVE,
+                "options": OLLAMA_OPTIONS
+            },
+            timeout=INITIAL_TIMEOUT
+        )
+    except:
+        pass
+
+@st.cache_resource
+def warm_ollama_models():
+    """Preload the model on every backend once per process, without blocking the UI"""
+    session = get_http_session()
+    for url in OLLAMA_URLS:
+        threading.Thread(target=_preload_model, args=(session, url), daemon=True).start()
+    return True
 
-def enhance_text_with_ollama(text: str) -> str:
-    """Robust Ollama API call with auto-retry and backoff"""
+def truncate_to_token_budget(text: str, max_tokens: int) -> str:
+    """Trim text to roughly max_tokens by UTF-8 bytes without splitting a codepoint"""
+    max_bytes = max_tokens * BYTES_PER_TOKEN
+    encoded = text.encode('utf-8')
+    if len(encoded) <= max_bytes:
+        return text
+    return encoded[:max_bytes].decode('utf-8', 'ignore')
+
+def build_chat_payload(text: str) -> dict:
+    """Build the streaming /api/chat request body for a document"""
+    return {
+        "model": OLLAMA_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": "You are a professional editor. Improve this document while preserving its meaning:"
+            },
+            {
+                "role": "user",
+                "content": truncate_to_token_budget(text, PROMPT_TOKEN_BUDGET)
+            }
+        ],
+        "stream": True,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": OLLAMA_OPTIONS
+    }
+
+async def enhance_async(client: httpx.AsyncClient, text: str, placeholder=None):
+    """Robust streaming Ollama API call with auto-retry, backoff and circuit breakers
+    
+    Returns (text, finished), where finished is True only if the model ended
+    the generation itself (done with done_reason "stop"), not on a cut-off
+    stream or a response truncated by the context limit. If a Streamlit
+    placeholder is given, it is updated as tokens arrive. The pool's
+    per-backend breakers record each attempt's outcome.
+    """
     timeout = INITIAL_TIMEOUT
+    pool = get_ollama_pool()
     
     for attempt in range(MAX_RETRIES):
         try:
-            if not check_ollama_connection():
-                raise ConnectionError("Ollama server unavailable")
-            
-            response = requests.post(
-                f"{OLLAMA_URL}/api/chat",
-                json={
-                    "model": OLLAMA_MODEL,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are a professional editor. Improve this document while preserving its meaning:"
-                        },
-                        {
-                            "role": "user",
-                            "content": text[:20000]  # Limit input size
-                        }
-                    ],
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "top_p": 0.9,
-                        "repeat_penalty": 1.1
-                    }
-                },
-                timeout=timeout
-            )
-            response.raise_for_status()
-            return response.json()["message"]["content"]
+            output = ""
+            finished = False
+            last_preview = 0.0
+            async with pool.acquire() as base_url:
+                async with client.stream(
+                    "POST",
+                    f"{base_url}/api/chat",
+                    content=orjson.dumps(build_chat_payload(text)),
+                    headers={"Content-Type": "application/json"},
+                    timeout=timeout
+                ) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        chunk = orjson.loads(line)
+                        if "error" in chunk:
+                            raise httpx.HTTPError(chunk["error"])
+                        output += chunk.get("message", {}).get("content", "")
+                        # Throttle previews: each update resends the whole text
+                        if placeholder is not None and time.monotonic() - last_preview >= PREVIEW_INTERVAL:
+                            placeholder.markdown(output)
+                            last_preview = time.monotonic()
+                        if chunk.get("done"):
+                            finished = chunk.get("done_reason") == "stop"
+                            break
+            return output, finished
         
-        except requests.exceptions.RequestException as e:
-            if attempt == MAX_RETRIES - 1:
-                raise  # Re-raise on final attempt
-            time.sleep(timeout * 0.5)  # Wait before retry
+        except CircuitBreakerOpen:
+            raise  # Fail fast, no retries while every backend's circuit is open
+        
+        except httpx.HTTPError as e:
+            if attempt == MAX_RETRIES - 1 or pool.all_open():
+                raise  # Re-raise on final attempt or once every circuit opens
+            await asyncio.sleep(timeout * 0.5)  # Wait before retry
             timeout *= TIMEOUT_BACKOFF_FACTOR  # Exponential backoff
             continue
         
         except Exception as e:
             st.error(f"Unexpected error: {str(e)}")
-            return text
+            return text, False
     
-    return text  # Fallback return
+    return text, False  # Fallback return
 
-def save_to_firestore(user_id, doc_name, original_content, enhanced_content):
-    """Save document to Firestore with error handling"""
-    try:
-        db = get_firestore_db()
-        doc_ref = db.collection("users").document(user_id).collection("documents").document()
+async def enhance_many(texts, placeholders=None):
+    """Enhance several documents concurrently, at most OLLAMA_CONCURRENCY at a time
+    
+    Returns one (text, finished) result per input, in order; a failed document
+    yields its exception. A BaseException such as Streamlit's rerun/stop signal
+    cancels the remaining documents and propagates immediately.
+    """
+    placeholders = placeholders or [None] * len(texts)
+    semaphore = asyncio.Semaphore(OLLAMA_CONCURRENCY)
+    
+    async with httpx.AsyncClient() as client:
+        async def run(text, placeholder):
+            async with semaphore:
+                try:
+                    return await enhance_async(client, text, placeholder)
+                except Exception as e:
+                    return e
         
-        doc_ref.set({
-            "doc_id": str(uuid.uuid4()),
-            "name": doc_name,
-            "original_content": original_content[:10000],
-            "enhanced_content": enhanced_content[:10000],
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
-            "status": "processed"
+        tasks = [
+            asyncio.ensure_future(run(text, placeholder))
+            for text, placeholder in zip(texts, placeholders)
+        ]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            # gather doesn't cancel siblings; stop them before the client closes
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+def enhancement_cache_key(text: str) -> str:
+    """Content hash identifying an enhancement of text by the current model"""
+    return hashlib.sha256(f"{OLLAMA_MODEL}\n{text}".encode('utf-8')).hexdigest()
+
+@st.cache_resource
+def get_enhancement_memo():
+    """Process-wide memo of enhancement cache entries, oldest evicted first"""
+    return {}
+
+def remember_enhancements(entries):
+    """Add (key, enhanced_content) pairs to the in-process memo"""
+    memo = get_enhancement_memo()
+    for key, enhanced_content in entries:
+        memo[key] = enhanced_content
+    while len(memo) > ENHANCEMENT_MEMO_SIZE:
+        memo.pop(next(iter(memo), None), None)
+
+def get_cached_enhancements(keys) -> dict:
+    """Map each cached key to its enhancement; misses and lookup failures are omitted
+    
+    Keys not in the in-process memo are fetched from Firestore in one get_all.
+    """
+    memo = get_enhancement_memo()
+    found = {key: memo[key] for key in keys if key in memo}
+    missing = [key for key in dict.fromkeys(keys) if key not in found]
+    if missing:
+        try:
+            db = get_firestore_db()
+            refs = [db.collection(ENHANCEMENT_CACHE_COLLECTION).document(key) for key in missing]
+            for snapshot in db.get_all(refs, field_paths=["enhanced_content"]):
+                if snapshot.exists:
+                    found[snapshot.id] = snapshot.get("enhanced_content")
+        except Exception:
+            pass  # Treat as misses; the cache only saves work
+        remember_enhancements([(key, found[key]) for key in missing if key in found])
+    return found
+
+def store_enhancements(entries, db=None):
+    """Write (key, enhanced_content) pairs to the enhancement cache in one batch
+    
+    Makes no Streamlit calls, so it is safe to run off the script thread.
+    """
+    db = db or get_firestore_db()
+    batch = db.batch()
+    for key, enhanced_content in entries:
+        batch.set(db.collection(ENHANCEMENT_CACHE_COLLECTION).document(key), {
+            "model": OLLAMA_MODEL,
+            "enhanced_content": enhanced_content,
+            "created_at": firestore.SERVER_TIMESTAMP
         })
-        
-        user_ref = db.collection("users").document(user_id)
-        user_ref.update({"doc_count": firestore.Increment(1)})
-        
-        return doc_ref.id
-    except Exception as e:
-        st.error(f"Failed to save document: {str(e)}")
-        return None
+    _commit_with_retry(batch)
+
+def enhance_documents(texts, placeholders=None):
+    """Enhance texts, only calling Ollama for content not already in the cache
+    
+    Returns one result per input, in order; a failed document yields its exception.
+    """
+    placeholders = placeholders or [None] * len(texts)
+    keys = [enhancement_cache_key(text) for text in texts]
+    cached = get_cached_enhancements(keys)
+    results = [cached.get(key) for key in keys]
+    
+    pending = [i for i, result in enumerate(results) if result is None]
+    # Probe once up front: the check blocks, so it must not run inside the event loop
+    if pending and not check_ollama_connection():
+        for i in pending:
+            results[i] = ConnectionError("Ollama server unavailable")
+        pending = []
+    if pending:
+        fresh = asyncio.run(enhance_many(
+            [texts[i] for i in pending],
+            [placeholders[i] for i in pending]
+        ))
+        to_cache = []
+        for i, result in zip(pending, fresh):
+            if isinstance(result, BaseException):
+                results[i] = result
+                continue
+            enhanced_text, finished = result
+            results[i] = enhanced_text
+            # Only cache complete rewrites; a cut-off one would be served forever
+            if finished and enhanced_text and enhanced_text != texts[i]:
+                to_cache.append((keys[i], enhanced_text))
+        if to_cache:
+            remember_enhancements(to_cache)
+            # Best effort: a failed cache write only costs a future regeneration
+            get_background_writer().submit(store_enhancements, to_cache, get_firestore_db())
+    
+    return results
+
+def _commit_with_retry(batch):
+    """Commit a WriteBatch, retrying when Firestore aborted it
+    
+    DeadlineExceeded is not retried: the commit may already have applied, and
+    resending the doc_count Increment would count the documents twice.
+    """
+    for attempt in range(MAX_RETRIES):
+        try:
+            return batch.commit()
+        except Aborted:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            time.sleep(0.5 * TIMEOUT_BACKOFF_FACTOR ** attempt)
+
+def save_to_firestore(user_id, documents, db=None):
+    """Save (doc_name, original, enhanced) tuples and bump the user's doc_count
+    
+    Each chunk holds at most FIRESTORE_BATCH_LIMIT mutations and chunks are
+    committed concurrently. Makes no Streamlit calls, so it is safe to run off
+    the script thread. Returns the list of new document ids.
+    """
+    db = db or get_firestore_db()
+    user_ref = db.collection("users").document(user_id)
+    
+    # Reserve one mutation per batch for the doc_count increment
+    per_batch = FIRESTORE_BATCH_LIMIT - 1
+    batches = []
+    doc_ids = []
+    for start in range(0, len(documents), per_batch):
+        chunk = documents[start:start + per_batch]
+        batch = db.batch()
+        for doc_name, original_content, enhanced_content in chunk:
+            doc_ref = user_ref.collection("documents").document()
+            batch.set(doc_ref, {
+                "doc_id": str(uuid.uuid4()),
+                "name": doc_name,
+                "original_content": original_content[:10000],
+                "enhanced_content": enhanced_content[:10000],
+                "created_at": firestore.SERVER_TIMESTAMP,
+                "updated_at": firestore.SERVER_TIMESTAMP,
+                "status": "processed"
+            })
+            doc_ids.append(doc_ref.id)
+        batch.update(user_ref, {"doc_count": firestore.Increment(len(chunk))})
+        batches.append(batch)
+    
+    if len(batches) == 1:
+        _commit_with_retry(batches[0])
+    else:
+        with ThreadPoolExecutor(max_workers=FIRESTORE_WRITE_WORKERS) as executor:
+            list(executor.map(_commit_with_retry, batches))
+    
+    return doc_ids
+
+@st.cache_resource
+def get_background_writer():
+    """Bounded worker pool for Firestore writes that the UI doesn't wait on"""
+    return ThreadPoolExecutor(max_workers=FIRESTORE_BACKGROUND_WORKERS)
+
+def save_in_background(user_id, documents):
+    """Queue documents for saving; the outcome is reported on a later rerun"""
+    future = get_background_writer().submit(
+        save_to_firestore, user_id, documents, get_firestore_db()
+    )
+    st.session_state.setdefault("pending_saves", []).append((len(documents), future))
+
+def report_background_saves():
+    """Surface the outcome of background saves that have finished"""
+    pending = []
+    for count, future in st.session_state.get("pending_saves", []):
+        if not future.done():
+            pending.append((count, future))
+        elif future.exception() is not None:
+            st.error(f"Failed to save {count} document(s): {str(future.exception())}")
+        else:
+            st.toast(f"{count} document(s) saved")
+            if 'doc_count' in st.session_state:
+                st.session_state.doc_count += count
+    st.session_state.pending_saves = pending
 
 def render_sidebar():
     """Sidebar with connection status"""
@@ -140,12 +456,14 @@ def render_sidebar():
             st.success("🟢 Ollama Connected")
             if st.button("Test Ollama Response"):
                 try:
-                    test_response = requests.post(
+                    test_response = get_http_session().post(
                         f"{OLLAMA_URL}/api/chat",
                         json={
                             "model": OLLAMA_MODEL,
                             "messages": [{"role": "user", "content": "Hello"}],
-                            "stream": False
+                            "stream": False,
+                            "keep_alive": OLLAMA_KEEP_ALIVE,
+                            "options": OLLAMA_OPTIONS
                         },
                         timeout=10
                     )
@@ -154,8 +472,9 @@ def render_sidebar():
                     st.error(f"Test failed: {str(e)}")
         else:
             st.error("🔴 Ollama Not Connected")
-            if st.button("Attempt to Start Ollama"):
+            if OLLAMA_IS_LOCAL and st.button("Attempt to Start Ollama"):
                 if start_ollama_server():
+                    check_ollama_connection.clear()
                     st.rerun()
                 else:
                     st.error("Failed to start Ollama server")
@@ -164,13 +483,19 @@ def render_sidebar():
             user = get_current_user()
             st.success(f"Logged in as {user.display_name}")
             
-            try:
-                db = get_firestore_db()
-                user_data = db.collection("users").document(user.uid).get().to_dict()
-                if user_data and 'doc_count' in user_data:
-                    st.info(f"Documents processed: {user_data['doc_count']}")
-            except:
-                pass
+            # Read doc_count once per session; saves keep it current locally
+            if 'doc_count' not in st.session_state:
+                try:
+                    db = get_firestore_db()
+                    user_data = db.collection("users").document(user.uid).get(
+                        field_paths=["doc_count"]
+                    ).to_dict()
+                    # Store even when the field is missing so we don't re-read every rerun
+                    st.session_state.doc_count = (user_data or {}).get('doc_count', 0)
+                except:
+                    pass
+            if 'doc_count' in st.session_state:
+                st.info(f"Documents processed: {st.session_state.doc_count}")
             
             if st.button("Logout"):
                 logout_user()
@@ -179,6 +504,11 @@ def render_sidebar():
             st.info("Please register or login")
 
 def main():
+    # Only warm (and cache that we did) once a backend answers
+    if check_ollama_connection():
+        warm_ollama_models()
+    # Settle finished saves first so the sidebar shows the updated doc_count
+    report_background_saves()
     render_sidebar()
     
     if not is_authenticated():
@@ -229,84 +559,103 @@ def main():
         - Check the terminal for errors
         """)
     
-    uploaded_file = st.file_uploader(
-        "Upload Document (TXT/PDF/DOCX)",
-        type=['txt', 'pdf', 'docx']
+    uploaded_files = st.file_uploader(
+        "Upload Documents (TXT/PDF/DOCX)",
+        type=['txt', 'pdf', 'docx'],
+        accept_multiple_files=True
     )
     
-    if uploaded_file:
-        try:
-            with st.spinner("Extracting text..."):
-                original_text = process_document(uploaded_file)
-                file_key = uploaded_file.name.replace(".", "_")
-            
-            with st.expander("Original Document", expanded=True):
+    if uploaded_files:
+        documents = []
+        for uploaded_file in uploaded_files:
+            try:
+                with st.spinner(f"Extracting text from {uploaded_file.name}..."):
+                    original_text = process_document(uploaded_file)
+                    # Unique per upload: names can repeat or collide once dots are replaced
+                    file_key = uploaded_file.file_id
+                documents.append((uploaded_file, original_text, file_key))
+            except Exception as e:
+                st.error(f"Error processing {uploaded_file.name}: {str(e)}")
+        
+        for uploaded_file, original_text, file_key in documents:
+            with st.expander(f"Original Document: {uploaded_file.name}", expanded=len(documents) == 1):
                 st.text_area(
                     "Original Content",
                     value=original_text,
                     height=250,
                     key=f"original_{file_key}"
                 )
+        
+        enhanced_texts = st.session_state.setdefault("enhanced_texts", {})
+        docx_files = st.session_state.setdefault("docx_files", {})
+        
+        if documents and st.button("✨ Enhance Documents" if len(documents) > 1 else "✨ Enhance Document",
+                                   key="enhance_documents",
+                                   disabled=not check_ollama_connection()):
+            with st.spinner("processing your documents (this may take several minutes for large documents)..."):
+                previews = [st.empty() for _ in documents]
+                results = enhance_documents(
+                    [original_text for _, original_text, _ in documents],
+                    previews
+                )
+                for preview in previews:
+                    preview.empty()
             
-            if st.button("✨ Enhance Document", 
-                        key=f"enhance_{file_key}",
-                        disabled=not check_ollama_connection()):
-                with st.spinner("processing your document (this may take several minutes for large documents)..."):
-                    try:
-                        enhanced_text = enhance_text_with_ollama(original_text)
-                        if enhanced_text and enhanced_text != original_text:
-                            st.session_state.enhanced_text = enhanced_text
-                            
-                            user = get_current_user()
-                            doc_id = save_to_firestore(
-                                user.uid,
-                                uploaded_file.name,
-                                original_text,
-                                enhanced_text
-                            )
-                            if doc_id:
-                                st.success("Document enhanced and saved successfully!")
-                            else:
-                                st.success("Document enhanced but failed to save to database")
-                        else:
-                            st.warning("""
-                            Document wasn't enhanced. Possible reasons:
-                            - The content was too short
-                            - The server is under heavy load
-                            - The model didn't make significant changes
-                            """)
-                    except Exception as e:
-                        st.error(f"Enhancement failed: {str(e)}")
+            to_save = []
+            for (uploaded_file, original_text, file_key), enhanced_text in zip(documents, results):
+                if isinstance(enhanced_text, BaseException):
+                    st.error(f"Enhancement failed for {uploaded_file.name}: {str(enhanced_text)}")
+                elif enhanced_text and enhanced_text != original_text:
+                    enhanced_texts[file_key] = enhanced_text
+                    docx_files.pop(file_key, None)
+                    to_save.append((uploaded_file.name, original_text, enhanced_text))
+                else:
+                    st.warning(f"""
+                    {uploaded_file.name} wasn't enhanced. Possible reasons:
+                    - The content was too short
+                    - The server is under heavy load
+                    - The model didn't make significant changes
+                    """)
             
-            if 'enhanced_text' in st.session_state:
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.subheader("Original Version")
-                    st.text_area(
-                        "Original View",
-                        value=original_text,
-                        height=400,
-                        key=f"orig_view_{file_key}"
-                    )
-                with col2:
-                    st.subheader("Enhanced Version")
-                    st.text_area(
-                        "Enhanced View",
-                        value=st.session_state.enhanced_text,
-                        height=400,
-                        key=f"enh_view_{file_key}"
-                    )
-                
-                st.download_button(
-                    "💾 Download Enhanced Doc",
-                    data=create_word_doc(st.session_state.enhanced_text),
-                    file_name=f"enhanced_{uploaded_file.name}",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    key=f"dl_{file_key}"
-                )
+            if to_save:
+                save_in_background(get_current_user().uid, to_save)
+                st.success(f"{len(to_save)} document(s) enhanced! Saving to your account in the background")
         
-        except Exception as e:
-            st.error(f"Error processing document: {str(e)}")
+        for uploaded_file, original_text, file_key in documents:
+            if file_key not in enhanced_texts:
+                continue
+            
+            if len(documents) > 1:
+                st.header(uploaded_file.name)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.subheader("Original Version")
+                st.text_area(
+                    "Original View",
+                    value=original_text,
+                    height=400,
+                    key=f"orig_view_{file_key}"
+                )
+            with col2:
+                st.subheader("Enhanced Version")
+                st.text_area(
+                    "Enhanced View",
+                    value=enhanced_texts[file_key],
+                    height=400,
+                    key=f"enh_view_{file_key}"
+                )
+            
+            # Build the DOCX once per enhancement rather than on every rerun
+            if file_key not in docx_files:
+                docx_files[file_key] = create_word_doc(enhanced_texts[file_key]).getvalue()
+            
+            st.download_button(
+                "💾 Download Enhanced Doc",
+                data=docx_files[file_key],
+                file_name=f"enhanced_{uploaded_file.name}",
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                key=f"dl_{file_key}"
+            )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+
+from utils.circuit_breaker import CircuitBreaker, CircuitBreakerOpen
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("utils.circuit_breaker.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_threshold=2, cooldown=30, half_open_max_calls=1)
+
+    def fail(self, times):
+        for _ in range(times):
+            self.breaker.before_call()
+            self.breaker.record_failure()
+
+    def test_opens_after_threshold(self):
+        self.fail(1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.fail(1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitBreakerOpen):
+            self.breaker.before_call()
+
+    def test_success_resets_failure_count(self):
+        self.fail(1)
+        self.breaker.before_call()
+        self.breaker.record_success()
+        self.fail(1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_after_cooldown_allows_one_trial(self):
+        self.fail(2)
+        self.now += 30
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.breaker.before_call()
+        with self.assertRaises(CircuitBreakerOpen):
+            self.breaker.before_call()
+
+    def test_half_open_success_closes(self):
+        self.fail(2)
+        self.now += 30
+        self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_failure_reopens(self):
+        self.fail(2)
+        self.now += 30
+        self.fail(1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_release_frees_abandoned_trial(self):
+        self.fail(2)
+        self.now += 30
+        self.breaker.before_call()
+        self.breaker.release()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.breaker.before_call()
+
+    def test_release_in_closed_state_is_noop(self):
+        self.breaker.before_call()
+        self.breaker.release()
+        self.fail(1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+if __name__ == "__main__":
+    unittest.main()
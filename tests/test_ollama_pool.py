@@ -0,0 +1,80 @@
+import asyncio
+import unittest
+
+from utils.circuit_breaker import CircuitBreaker, CircuitBreakerOpen
+from utils.ollama_pool import OllamaPool
+
+def single_failure_breaker():
+    return CircuitBreaker(failure_threshold=1, cooldown=60)
+
+class OllamaPoolTest(unittest.IsolatedAsyncioTestCase):
+    async def test_spreads_calls_across_backends(self):
+        pool = OllamaPool(["a", "b", "c"], slots_per_backend=2)
+        async with pool.acquire() as first:
+            async with pool.acquire() as second:
+                self.assertNotEqual(first, second)
+                self.assertEqual(sorted(pool.active_calls().values()), [0, 1, 1])
+
+    async def test_ties_rotate_round_robin(self):
+        pool = OllamaPool(["a", "b", "c"])
+        picked = []
+        for _ in range(4):
+            async with pool.acquire() as url:
+                picked.append(url)
+        self.assertEqual(picked, ["a", "b", "c", "a"])
+
+    async def test_waits_for_a_free_slot(self):
+        pool = OllamaPool(["a"], poll_interval=0.01)
+        order = []
+
+        async def call(name, hold):
+            async with pool.acquire():
+                order.append(f"{name}-start")
+                await asyncio.sleep(hold)
+                order.append(f"{name}-end")
+
+        await asyncio.gather(call("first", 0.05), call("second", 0))
+        self.assertEqual(order, ["first-start", "first-end", "second-start", "second-end"])
+
+    async def test_slot_released_on_error(self):
+        pool = OllamaPool(["a"])
+        with self.assertRaises(RuntimeError):
+            async with pool.acquire():
+                raise RuntimeError("boom")
+        self.assertEqual(pool.active_calls(), {"a": 0})
+
+    async def test_skips_backend_with_open_circuit(self):
+        pool = OllamaPool(["a", "b"], breaker_factory=single_failure_breaker)
+        with self.assertRaises(RuntimeError):
+            async with pool.acquire() as url:
+                self.assertEqual(url, "a")
+                raise RuntimeError("backend down")
+        self.assertEqual(pool.breaker_states()["a"], CircuitBreaker.OPEN)
+        for _ in range(3):
+            async with pool.acquire() as url:
+                self.assertEqual(url, "b")
+
+    async def test_raises_when_every_circuit_is_open(self):
+        pool = OllamaPool(["a"], breaker_factory=single_failure_breaker)
+        with self.assertRaises(RuntimeError):
+            async with pool.acquire():
+                raise RuntimeError("backend down")
+        self.assertTrue(pool.all_open())
+        with self.assertRaises(CircuitBreakerOpen):
+            async with pool.acquire():
+                pass
+
+    async def test_cancelled_call_does_not_count_as_failure(self):
+        pool = OllamaPool(["a"], breaker_factory=single_failure_breaker)
+        with self.assertRaises(asyncio.CancelledError):
+            async with pool.acquire():
+                raise asyncio.CancelledError()
+        self.assertEqual(pool.breaker_states(), {"a": CircuitBreaker.CLOSED})
+        self.assertEqual(pool.active_calls(), {"a": 0})
+
+    def test_requires_a_url(self):
+        with self.assertRaises(ValueError):
+            OllamaPool([])
+
+if __name__ == "__main__":
+    unittest.main()
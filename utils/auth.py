@@ -1,3 +1,4 @@
+import functools
 import firebase_admin
 from firebase_admin import credentials, auth, firestore
 import streamlit as st
@@ -7,36 +8,42 @@ class AuthError(Exception):
     """Custom authentication error class"""
     pass
 
-def initialize_firebase():
-    """Initialize Firebase app if not already initialized"""
+SERVICE_ACCOUNT_FILE = "ai-doc-assistant-e2136-30ca48038308.json"
+FIREBASE_SECRET_KEYS = (
+    "type",
+    "project_id",
+    "private_key_id",
+    "private_key",
+    "client_email",
+    "client_id",
+    "auth_uri",
+    "token_uri",
+    "auth_provider_x509_cert_url",
+    "client_x509_cert_url"
+)
+
+@functools.lru_cache(maxsize=1)
+def _ensure_firebase():
+    """Initialize Firebase app on first use; later calls are no-ops"""
     if not firebase_admin._apps:
         try:
-            if st.secrets.has_key("firebase"):
-                firebase_config = {
-                    "type": st.secrets["firebase"]["type"],
-                    "project_id": st.secrets["firebase"]["project_id"],
-                    "private_key_id": st.secrets["firebase"]["private_key_id"],
-                    "private_key": st.secrets["firebase"]["private_key"].replace('\\n', '\n'),
-                    "client_email": st.secrets["firebase"]["client_email"],
-                    "client_id": st.secrets["firebase"]["client_id"],
-                    "auth_uri": st.secrets["firebase"]["auth_uri"],
-                    "token_uri": st.secrets["firebase"]["token_uri"],
-                    "auth_provider_x509_cert_url": st.secrets["firebase"]["auth_provider_x509_cert_url"],
-                    "client_x509_cert_url": st.secrets["firebase"]["client_x509_cert_url"]
-                }
+            if "firebase" in st.secrets:
+                secrets = st.secrets["firebase"]
+                firebase_config = {key: secrets[key] for key in FIREBASE_SECRET_KEYS}
+                firebase_config["private_key"] = firebase_config["private_key"].replace('\\n', '\n')
                 cred = credentials.Certificate(firebase_config)
             else:
-                cred = credentials.Certificate("ai-doc-assistant-e2136-30ca48038308.json")
+                cred = credentials.Certificate(SERVICE_ACCOUNT_FILE)
             
             firebase_admin.initialize_app(cred)
         except Exception as e:
             st.error(f"Firebase initialization failed: {str(e)}")
             raise AuthError("Failed to initialize Firebase")
 
-initialize_firebase()
-
+@st.cache_resource
 def get_firestore_db():
-    """Get Firestore database instance"""
+    """Get Firestore database instance, shared across reruns and sessions"""
+    _ensure_firebase()
     return firestore.client()
 
 def firebase_signup(email: str, password: str, username: str) -> auth.UserRecord:
@@ -47,6 +54,7 @@ def firebase_signup(email: str, password: str, username: str) -> auth.UserRecord
         if len(password) < 6:
             raise AuthError("Password must be at least 6 characters")
         
+        _ensure_firebase()
         user = auth.create_user(
             email=email,
             password=password,
@@ -80,16 +88,14 @@ def firebase_login(email: str, password: str) -> auth.UserRecord:
         if not email or not password:
             raise AuthError("Email and password are required")
             
+        _ensure_firebase()
         user = auth.get_user_by_email(email)
         
+        # A merge write creates or updates in one RPC, no existence read needed
         db = get_firestore_db()
-        user_ref = db.collection("users").document(user.uid).get()
-        if not user_ref.exists:
-            raise AuthError("User account not properly registered")
-            
-        db.collection("users").document(user.uid).update({
+        db.collection("users").document(user.uid).set({
             "last_login": firestore.SERVER_TIMESTAMP
-        })
+        }, merge=True)
         
         return user
         
@@ -110,8 +116,14 @@ def logout_user():
     """Clear user session"""
     if 'user' in st.session_state:
         del st.session_state.user
-    if 'enhanced_text' in st.session_state:
-        del st.session_state.enhanced_text
+    if 'enhanced_texts' in st.session_state:
+        del st.session_state.enhanced_texts
+    if 'docx_files' in st.session_state:
+        del st.session_state.docx_files
+    if 'doc_count' in st.session_state:
+        del st.session_state.doc_count
+    if 'pending_saves' in st.session_state:
+        del st.session_state.pending_saves
     if 'last_doc_id' in st.session_state:
         del st.session_state.last_doc_id
     st.rerun() 
\ No newline at end of file
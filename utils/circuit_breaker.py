@@ -0,0 +1,83 @@
+import threading
+import time
+
+class CircuitBreakerOpen(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+    pass
+
+class CircuitBreaker:
+    """Fail fast once a backend has failed repeatedly
+
+    CLOSED lets calls through and counts consecutive failures. After
+    failure_threshold failures the circuit goes OPEN and rejects calls until
+    cooldown seconds have passed, then HALF_OPEN allows up to
+    half_open_max_calls trial calls. A trial success closes the circuit,
+    a trial failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30,
+                 half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state, moving OPEN to HALF_OPEN once the cooldown elapses"""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+    def before_call(self):
+        """Reserve a call slot or raise CircuitBreakerOpen"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.OPEN:
+                remaining = self.cooldown - (time.monotonic() - self._opened_at)
+                raise CircuitBreakerOpen(
+                    f"Service unavailable, retry in {max(remaining, 0):.0f}s"
+                )
+            if state == self.HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    raise CircuitBreakerOpen("Service unavailable, recovery check in progress")
+                self._half_open_calls += 1
+
+    def release(self):
+        """Give back a reserved call slot without judging the backend
+
+        Used when a call is abandoned (Streamlit rerun/stop, task cancellation)
+        so a HALF_OPEN trial slot is not held forever.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_success(self):
+        """Close the circuit after a successful call"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._half_open_calls = 0
+
+    def record_failure(self):
+        """Count a failure, opening the circuit when the threshold is hit"""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._half_open_calls = 0
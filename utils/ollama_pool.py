@@ -0,0 +1,95 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List
+
+from utils.circuit_breaker import CircuitBreaker, CircuitBreakerOpen
+
+class OllamaPool:
+    """Route calls to the healthy Ollama backend with the fewest in-flight requests
+
+    Each backend takes at most slots_per_backend calls at once (an Ollama
+    instance serves one generation at a time by default); further callers
+    wait here instead of queueing inside the server, where they would burn
+    their read timeout. Every backend has its own circuit breaker, so a dead
+    backend is skipped rather than failing calls for the whole pool. Ties are
+    broken round-robin so idle backends share the load evenly.
+    """
+
+    def __init__(self, urls: List[str], slots_per_backend: int = 1,
+                 poll_interval: float = 0.1,
+                 breaker_factory: Callable[[], CircuitBreaker] = CircuitBreaker):
+        if not urls:
+            raise ValueError("At least one Ollama URL is required")
+        self.urls = list(urls)
+        self.slots_per_backend = slots_per_backend
+        self.poll_interval = poll_interval
+        self._active = {url: 0 for url in self.urls}
+        self._breakers = {url: breaker_factory() for url in self.urls}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _try_reserve(self):
+        """Reserve a slot on the least busy healthy backend, or return None if all are busy
+
+        Raises CircuitBreakerOpen when every backend's circuit is open.
+        """
+        with self._lock:
+            if self.all_open():
+                raise CircuitBreakerOpen("All Ollama backends are unavailable")
+            order = self.urls[self._next:] + self.urls[:self._next]
+            free = [url for url in order if self._active[url] < self.slots_per_backend]
+            for url in sorted(free, key=self._active.get):
+                try:
+                    self._breakers[url].before_call()
+                except CircuitBreakerOpen:
+                    continue
+                self._active[url] += 1
+                self._next = (self.urls.index(url) + 1) % len(self.urls)
+                return url
+            return None
+
+    def _release(self, url: str):
+        with self._lock:
+            self._active[url] -= 1
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Wait for a free healthy backend and hold it for the duration of a call
+
+        The backend's breaker records the outcome: an exception is a failure,
+        a clean exit a success, and an abandoned call (rerun, cancellation)
+        just gives back its breaker slot.
+        """
+        url = self._try_reserve()
+        while url is None:
+            # Sessions run their own event loops in separate threads, so poll
+            # rather than share an asyncio primitive across loops
+            await asyncio.sleep(self.poll_interval)
+            url = self._try_reserve()
+        breaker = self._breakers[url]
+        try:
+            yield url
+        except Exception:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        else:
+            breaker.record_success()
+        finally:
+            self._release(url)
+
+    def all_open(self) -> bool:
+        """True when no backend currently accepts calls"""
+        return all(breaker.state == CircuitBreaker.OPEN for breaker in self._breakers.values())
+
+    def breaker_states(self) -> Dict[str, str]:
+        """Snapshot of the circuit state per backend"""
+        return {url: breaker.state for url, breaker in self._breakers.items()}
+
+    def active_calls(self) -> Dict[str, int]:
+        """Snapshot of in-flight calls per backend"""
+        with self._lock:
+            return dict(self._active)
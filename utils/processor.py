@@ -1,11 +1,40 @@
-import PyPDF2
+import pypdfium2 as pdfium
 from docx import Document
-import tempfile
-import os
 from io import BytesIO
 import pytesseract
 from PIL import Image
-import pdf2image
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+
+OCR_DPI = 200
+
+# PDFium is not thread-safe, even across documents, and Streamlit runs each
+# session in its own thread, so every pdfium call goes through this lock
+_PDFIUM_LOCK = threading.Lock()
+
+def _page_text(pdf, index: int) -> str:
+    """Extract the text layer of a PDF page with pdfium"""
+    with _PDFIUM_LOCK:
+        page = pdf[index]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range().replace('\r\n', '\n')
+        finally:
+            textpage.close()
+            page.close()
+
+def _page_image(pdf, index: int):
+    """Render a PDF page to a PIL image at OCR_DPI"""
+    with _PDFIUM_LOCK:
+        page = pdf[index]
+        bitmap = page.render(scale=OCR_DPI / 72)
+        try:
+            # Copy so the image no longer shares the pdfium buffer
+            return bitmap.to_pil().copy()
+        finally:
+            bitmap.close()
+            page.close()
 
 def process_document(file) -> str:
     """Process uploaded file and return text content with OCR fallback"""
@@ -18,26 +47,35 @@ def process_document(file) -> str:
             return '\n'.join([para.text for para in doc.paragraphs])
         
         elif file.name.endswith('.pdf'):
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
-                tmp.write(file.getvalue())
-                tmp_path = tmp.name
-            
+            with _PDFIUM_LOCK:
+                pdf = pdfium.PdfDocument(file.getvalue())
+                page_count = len(pdf)
             try:
-                text = ""
-                with open(tmp_path, 'rb') as f:
-                    reader = PyPDF2.PdfReader(f)
-                    for page in reader.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-                        else:
-                            # OCR fallback for scanned PDFs
-                            images = pdf2image.convert_from_path(tmp_path)
-                            for image in images:
-                                text += pytesseract.image_to_string(image) + "\n"
-                return text
+                # Decide per document: a first page without text means a
+                # scanned PDF, so skip text extraction and OCR every page
+                first_text = _page_text(pdf, 0) if page_count else ""
+                if first_text.strip():
+                    page_texts = [first_text] + [_page_text(pdf, i) for i in range(1, page_count)]
+                else:
+                    page_texts = [""] * page_count
+                
+                # OCR fallback for scanned pages: each worker renders one page
+                # without a text layer and OCRs it, so only in-flight pages are
+                # held in memory. Threads suffice since tesseract runs as a
+                # subprocess
+                missing = [i for i, page_text in enumerate(page_texts) if not page_text.strip()]
+                if missing:
+                    def ocr_page(index):
+                        return pytesseract.image_to_string(_page_image(pdf, index))
+                    
+                    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                        for i, page_text in zip(missing, executor.map(ocr_page, missing)):
+                            page_texts[i] = page_text
+                
+                return "\n".join(page_texts)
             finally:
-                os.unlink(tmp_path)
+                with _PDFIUM_LOCK:
+                    pdf.close()
         
         else:
             raise ValueError(f"Unsupported file format: {file.name}")
@@ -53,9 +91,8 @@ def create_word_doc(content: str) -> BytesIO:
     doc.add_heading('Enhanced Document', level=1)
     
     # Preserve paragraphs
-    for paragraph in content.split('\n'):
-        if paragraph.strip():
-            doc.add_paragraph(paragraph)
+    for paragraph in filter(str.strip, content.splitlines()):
+        doc.add_paragraph(paragraph)
     
     output = BytesIO()
     doc.save(output)